@@ -2,15 +2,71 @@
 
 import os
 import sys
-import argparse
-import textwrap
-import collections
+import types
+import operator
+import itertools
 
-import requests
-import requests.exceptions
 
+class Repo:
+    """A GitHub repository."""
 
-Repo = collections.namedtuple("Repo", ["full_name", "description", "stars"])
+    __slots__ = ("full_name", "description", "stars")
+
+    def __init__(self, full_name, description, stars):
+        self.full_name = full_name
+        self.description = description
+        self.stars = stars
+
+    def __repr__(self):
+        return "Repo(full_name={!r}, description={!r}, stars={!r})".format(
+            self.full_name, self.description, self.stars
+        )
+
+    def _astuple(self):
+        return (self.full_name, self.description, self.stars)
+
+    def __eq__(self, other):
+        if not isinstance(other, Repo):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    def __hash__(self):
+        return hash(self._astuple())
+
+
+_EXAMPLE_TEXT = """\
+examples:
+  ghstar gokulsoumya/ghstar
+  ghstar jlevy/the-art-of-command-line
+  ghstar psf/requests psf/black
+"""
+
+# fields of a search result item used to build a Repo, in Repo's argument order
+_REPO_FIELDS = operator.itemgetter("full_name", "description", "stargazers_count")
+
+# how long cached search results are used without asking GitHub, and how
+# long they are kept around for revalidation (both in seconds)
+_SEARCH_CACHE_TTL = 5 * 60
+_SEARCH_CACHE_MAX_AGE = 24 * 60 * 60
+_SEARCH_CACHE_FILE = "search.json"
+
+# characters allowed in the owner and name parts of a repo
+_REPO_NAME_CHARS = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._-"
+)
+
+# number of repos starred at the same time when given several
+_MAX_CONCURRENT_STARS = 8
+
+# shared across requests so that the connection to the API is kept alive
+_session = None
+
+# auth for the session, set before it is created so that creating it (and
+# importing requests) can wait until a request is actually made
+_auth = None
+
+# prepared star request and send() options, copied for each repo starred
+_star_template = None
 
 
 class AuthError(Exception):
@@ -41,24 +97,51 @@ class NoSearchResultsError(Exception):
         super().__init__(msg)
 
 
+_STAR_URL = "https://api.github.com/user/starred/{}"
+_STAR_HEADERS = {"Content-Length": "0"}  # not modified by requests
+
+# exceptions to raise for error responses to a star request, called with the repo
+_STAR_ERRORS = {
+    401: lambda repo: AuthError(),
+    404: InvalidRepoError,
+}
+
+
+class _BasicAuth:
+    """
+    `requests` auth that sets a Basic Authorization header encoded once up
+    front, rather than re-encoding the credentials for every request like
+    passing a (username, token) tuple does. Being the request's own auth also
+    stops `requests` from replacing it with credentials from ~/.netrc.
+    """
+
+    def __init__(self, username, token):
+        import base64  # imports re, so kept off the startup path
+
+        credentials = base64.b64encode("{}:{}".format(username, token).encode())
+        self.header = "Basic " + credentials.decode()
+
+    def __call__(self, request):
+        request.headers["Authorization"] = self.header
+        return request
+
+
 def get_argparser():
     """Returns an `ArgumentParser()` for parsing command line options."""
-    example_text = textwrap.dedent(  # ignore common whitespace for all lines
-        """
-        examples:
-          ghstar gokulsoumya/ghstar
-          ghstar jlevy/the-art-of-command-line
-        """
-    )
+    import argparse
 
     parser = argparse.ArgumentParser(
         prog="ghstar",
         description="Star GitHub repos from the command line.",
-        epilog=example_text,
+        epilog=_EXAMPLE_TEXT,
         # specify formatter_class to preserve newlines in epilog
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
-    parser.add_argument("repo", help="name of repo to star")
+    parser.add_argument(
+        "repo",
+        nargs="+",
+        help="names of repos to star, or search terms when run interactively",
+    )
     parser.add_argument(
         "-i",
         "--interactive",
@@ -76,6 +159,42 @@ def get_argparser():
     return parser
 
 
+def parse_args(argv):
+    """
+    Parse command line options. Only the common invocations are handled
+    here; --help and anything unusual are left to `get_argparser()`, which
+    also takes care of printing usage errors.
+
+    Args:
+        argv (sequence of str): Command line arguments, without the
+            program name.
+
+    Returns:
+        types.SimpleNamespace: Parsed options, with the same attributes as
+            the namespace returned by `get_argparser()`.
+    """
+    args = types.SimpleNamespace(repo=[], interactive=False, search_count=10)
+
+    options = iter(argv)
+    for arg in options:
+        if arg in ("-i", "--interactive"):
+            args.interactive = True
+        elif arg in ("-n", "--search-count"):
+            try:
+                args.search_count = int(next(options))
+            except (StopIteration, ValueError):
+                return get_argparser().parse_args(argv)
+        elif arg.startswith("-"):
+            return get_argparser().parse_args(argv)
+        else:
+            args.repo.append(arg)
+
+    if not args.repo:
+        return get_argparser().parse_args(argv)
+
+    return args
+
+
 def get_credentials():
     """
     Get GitHub user credentials from the environment variables
@@ -88,42 +207,217 @@ def get_credentials():
         AuthError: If username or token is empty.
     """
 
-    gh_user = os.getenv("GH_UNAME")
-    gh_token = os.getenv("GH_TOKEN")
+    gh_user = os.environ.get("GH_UNAME")
+    if not gh_user:
+        raise AuthError()
 
-    if not (gh_user and gh_token):
+    gh_token = os.environ.get("GH_TOKEN")
+    if not gh_token:
         raise AuthError()
 
     return (gh_user, gh_token)
 
 
-def search_repo(query, gh_user, gh_token):
+def set_credentials(gh_user, gh_token):
     """
-    Search for a repo on GitHub. Searches in the project's description
-    and readme.
+    Set the credentials used for all API calls.
+
+    Args:
+        gh_user (str): GitHub username.
+        gh_token (str): GitHub access token or password.
+    """
+    global _auth
+
+    _auth = _BasicAuth(gh_user, gh_token)
+    if _session is not None:
+        _session.auth = _auth
+
+
+def _get_session():
+    """
+    Returns the `requests.Session()` shared by all API calls, creating it
+    on first use with the credentials given to `set_credentials()`.
+    """
+    global _session
+
+    if _session is None:
+        # requests is slow to import, so only pay for it once a request
+        # is actually about to be made
+        import requests
+        import requests.adapters
+
+        _session = requests.Session()
+        _session.auth = _auth
+        _session.mount(
+            "https://",
+            requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=_MAX_CONCURRENT_STARS
+            ),
+        )
+
+    return _session
+
+
+def _get_star_template():
+    """
+    Returns a prepared star request along with the keyword arguments to
+    `send()` it with, building them on first use. Merging the session's
+    headers and the environment's proxy settings is done once here instead
+    of by `requests` for every repo starred.
+    """
+    global _star_template
+
+    if _star_template is None:
+        import requests
+
+        session = _get_session()
+        request = session.prepare_request(
+            requests.Request("PUT", _STAR_URL.format(""), headers=_STAR_HEADERS)
+        )
+        send_kwargs = session.merge_environment_settings(
+            request.url, proxies={}, stream=None, verify=None, cert=None
+        )
+        _star_template = (request, send_kwargs)
+
+    return _star_template
+
+
+def _get_search_cache_dir():
+    """
+    Returns the per-user directory search results are cached in, following
+    the XDG base directory spec.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "ghstar")
+
+
+def _load_search_cache():
+    """
+    Load cached search results.
 
     Returns:
-        sequence of Repo: Repositories matching the search query.
+        dict: Cache entries keyed by search, empty if there is no usable cache.
     """
+    import json
+
+    path = os.path.join(_get_search_cache_dir(), _SEARCH_CACHE_FILE)
     try:
-        r = requests.get(
-            url="https://api.github.com/search/repositories",
-            auth=(gh_user, gh_token),
-            params={"q": query},
-        )
-    except requests.exceptions.ConnectionError:
-        raise ConnectionError("Please check your internet connection.")
+        with open(path) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
 
-    result = []
+def _save_search_cache(cache):
+    """
+    Save search results to the cache file, dropping entries too old to be
+    worth revalidating. The file is only readable by the user since results
+    can include their private repos. Failures are ignored since the cache is
+    only an optimization.
 
-    for repo_item in r.json()["items"]:
-        result.append(
-            Repo(
-                repo_item["full_name"],
-                repo_item["description"],
-                repo_item["stargazers_count"],
+    Args:
+        cache (dict): Cache entries keyed by search.
+    """
+    import json
+    import time
+    import tempfile
+
+    now = time.time()
+    cache = {
+        key: entry
+        for key, entry in cache.items()
+        if now - entry["time"] < _SEARCH_CACHE_MAX_AGE
+    }
+
+    cache_dir = _get_search_cache_dir()
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        # mkstemp() creates the file with mode 0600 under a name nobody
+        # else can predict, and os.replace() swaps it in atomically
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as cache_file:
+                json.dump(cache, cache_file)
+            os.replace(temp_path, os.path.join(cache_dir, _SEARCH_CACHE_FILE))
+        except OSError:
+            os.remove(temp_path)
+            raise
+    except OSError:
+        pass
+
+
+def search_repo(query, count=10):
+    """
+    Search for a repo on GitHub. Searches in the project's description
+    and readme. Results are cached for a few minutes, after which they are
+    revalidated using their ETag.
+
+    Args:
+        query (str): Search query.
+        count (int): Maximum number of results to fetch, most starred first.
+
+    Returns:
+        sequence of Repo: Repositories matching the search query.
+    """
+    import time
+
+    cache = _load_search_cache()
+    # results depend on the user, since authenticated searches include
+    # their private repos
+    cache_key = "{}:{}:{}".format(os.environ.get("GH_UNAME", ""), count, query)
+    cached = cache.get(cache_key)
+
+    if cached is not None and time.time() - cached["time"] < _SEARCH_CACHE_TTL:
+        result = list(itertools.starmap(Repo, cached["items"]))
+    else:
+        import requests.exceptions
+
+        headers = {
+            "Accept": "application/vnd.github+json",
+            # search results are repetitive JSON and compress very well
+            "Accept-Encoding": "gzip",
+        }
+        if cached is not None and cached["etag"]:
+            # a 304 Not Modified response does not count against the rate limit
+            headers["If-None-Match"] = cached["etag"]
+
+        try:
+            r = _get_session().get(
+                url="https://api.github.com/search/repositories",
+                params={
+                    "q": query,
+                    # only ask for as many results as will be shown
+                    "per_page": min(count, 100),
+                    "sort": "stars",
+                    "order": "desc",
+                },
+                headers=headers,
             )
-        )
+        except requests.exceptions.ConnectionError:
+            raise ConnectionError("Please check your internet connection.")
+
+        if r.status_code == 304:
+            result = list(itertools.starmap(Repo, cached["items"]))
+        else:
+            try:
+                import orjson  # optional, decodes faster than json
+            except ImportError:
+                repo_items = r.json()["items"]
+            else:
+                repo_items = orjson.loads(r.content)["items"]
+
+            result = list(itertools.starmap(Repo, map(_REPO_FIELDS, repo_items)))
+
+        cache[cache_key] = {
+            "time": time.time(),
+            "etag": r.headers.get("ETag"),
+            "items": [
+                [repo.full_name, repo.description, repo.stars] for repo in result
+            ],
+        }
+        _save_search_cache(cache)
 
     if not result:
         raise NoSearchResultsError(query)
@@ -141,23 +435,40 @@ def select_repo(repos):
     Returns:
         Repo: The user selected repository.
     """
-    print()
-    for index, repo in enumerate(repos):
-        print(
-            "[{number}] {repo_name} - {desc} ({stars} stars)".format(
-                number=index + 1,
-                repo_name=repo.full_name,
-                desc=repo.description,
-                stars=repo.stars,
-            )
+    menu = [
+        "[{}] {} - {} ({} stars)".format(
+            number, repo.full_name, repo.description, repo.stars
         )
-    print()
+        for number, repo in enumerate(repos, start=1)
+    ]
+    # written in one go rather than a print() per line
+    sys.stdout.write("\n" + "\n".join(menu) + "\n\n")
 
     number = input("Select the repository [1-{}]: ".format(len(repos)))
     return repos[int(number) - 1]
 
 
-def star_repo(repo, gh_user, gh_token):
+def _is_valid_repo_name(full_name):
+    """
+    Check that `full_name` looks like owner/name, so that anything else can
+    be rejected without asking GitHub. Checked without `re` since importing
+    it costs more than the check itself. "." and ".." are refused as either
+    part since they would be resolved as path segments in the star URL and
+    send the request to a different endpoint.
+
+    Returns:
+        bool: True if the name is well formed.
+    """
+    owner, _, name = full_name.partition("/")
+    return bool(
+        owner not in ("", ".", "..")
+        and name not in ("", ".", "..")
+        and _REPO_NAME_CHARS.issuperset(owner)
+        and _REPO_NAME_CHARS.issuperset(name)
+    )
+
+
+def star_repo(repo):
     """
     Star a repo on GitHub.
 
@@ -169,41 +480,87 @@ def star_repo(repo, gh_user, gh_token):
         InvalidRepoError: Invalid repo name.
         ConnectionError: No internet connection.
     """
+    if not _is_valid_repo_name(repo.full_name):
+        raise InvalidRepoError(repo)
+
+    import requests.exceptions
+
+    template, send_kwargs = _get_star_template()
+    request = template.copy()
+    request.prepare_url(_STAR_URL.format(repo.full_name), params=None)
+
     try:
-        r = requests.put(
-            url="https://api.github.com/user/starred/" + repo.full_name,
-            auth=(gh_user, gh_token),
-            headers={"Content-Length": "0"},
-        )
+        r = _get_session().send(request, **send_kwargs)
     except requests.exceptions.ConnectionError:
         raise ConnectionError("Please check your internet connection.")
 
-    if r.status_code == 401:
-        raise AuthError()
-    elif r.status_code == 404:
-        raise InvalidRepoError(repo)
+    if r.status_code == 204:  # starred
+        return
+
+    error = _STAR_ERRORS.get(r.status_code)
+    if error is not None:
+        raise error(repo)
+
+
+def star_repos(repos):
+    """
+    Star several repos on GitHub, a few at a time over the shared session.
+
+    Args:
+        repos (sequence of Repo): Repositories to star.
+
+    Returns:
+        list of (Repo, Exception): Each repository paired with the
+            `AuthError`, `ConnectionError` or `InvalidRepoError` starring it
+            failed with, or None if it was starred. Errors are collected
+            rather than raised so that repos starred before a failure are
+            still reported.
+    """
+
+    def star(repo):
+        try:
+            star_repo(repo)
+        except (AuthError, ConnectionError, InvalidRepoError) as error:
+            return error
+
+    if len(repos) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        # set up the shared session and request template here, since the
+        # lazy initialisation is not thread safe and racing workers would
+        # each build their own session and connection pool
+        _get_star_template()
+
+        with ThreadPoolExecutor(max_workers=_MAX_CONCURRENT_STARS) as executor:
+            errors = list(executor.map(star, repos))
+    else:
+        errors = [star(repo) for repo in repos]
+
+    return list(zip(repos, errors))
 
 
 def main():
-    parser = get_argparser()
-    args = parser.parse_args()
+    args = parse_args(sys.argv[1:])
 
     try:
-        username, token = get_credentials()
+        set_credentials(*get_credentials())
+
         if args.interactive:
             search_results = search_repo(
-                query=args.repo, gh_user=username, gh_token=token
+                query=" ".join(args.repo), count=args.search_count
             )
-            repo = select_repo(search_results[: args.search_count])
+            repos = [select_repo(search_results[: args.search_count])]
         else:
-            repo = Repo(full_name=args.repo, description=None, stars=None)
+            repos = [
+                Repo(full_name=name, description=None, stars=None)
+                for name in args.repo
+            ]
 
-        star_repo(repo=repo, gh_user=username, gh_token=token)
+        results = star_repos(repos)
 
     except (
         AuthError,
         ConnectionError,
-        InvalidRepoError,
         NoSearchResultsError,
     ) as error:
         exit(error)
@@ -211,5 +568,21 @@ def main():
     except KeyboardInterrupt:
         exit(1)
 
-    print("Starred " + repo.full_name)
-    exit(0)
+    auth_error = None
+    for repo, error in results:
+        if error is None:
+            print("Starred " + repo.full_name)
+        elif isinstance(error, AuthError):
+            auth_error = error  # the same for every repo, so reported once
+        elif isinstance(error, InvalidRepoError):
+            print(error, file=sys.stderr)
+        else:
+            print(
+                "Could not star {}: {}".format(repo.full_name, error),
+                file=sys.stderr,
+            )
+
+    if auth_error is not None:
+        exit(auth_error)
+
+    exit(1 if any(error for _, error in results) else 0)